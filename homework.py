@@ -1,13 +1,18 @@
+import dbm
+import hashlib
 import logging
 import os
+import random
 import sys
 import time
 from http import HTTPStatus
 from logging import StreamHandler
+from operator import itemgetter
 
+import orjson
 import requests
 import telegram
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
 from dotenv import load_dotenv
 
 from exceptions import HTTPError, ApiRequestError
@@ -17,15 +22,27 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+BOT_STATE_FILE = os.getenv('BOT_STATE_FILE')
+LOG_LEVEL_NAME = os.getenv('LOG_LEVEL', 'INFO')
 
 RETRY_PERIOD = 600
+RETRY_PERIOD_MAX = 3600
+RETRY_JITTER = 30
+REQUEST_TIMEOUT = (5, 30)
+TELEGRAM_TIMEOUT = 10
+TELEGRAM_SEND_ATTEMPTS = 3
+TELEGRAM_RETRY_MAX = 30
+SENT_MESSAGE_TTL = RETRY_PERIOD * 2
+STATE_KEY = f'bot:last_status:{TELEGRAM_CHAT_ID}'
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN }'}
+HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+HOMEWORK_FIELDS = itemgetter('homework_name', 'status')
+
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -35,6 +52,14 @@ formatter = logging.Formatter(
     '%(asctime)s - %(levelname)s - %(message)s - %(name)s'
 )
 handler.setFormatter(formatter)
+LOG_LEVEL = getattr(logging, LOG_LEVEL_NAME.upper(), None)
+if not isinstance(LOG_LEVEL, int):
+    logger.warning(
+        'Неизвестный уровень логирования %r, используется INFO.',
+        LOG_LEVEL_NAME
+    )
+    LOG_LEVEL = logging.INFO
+handler.setLevel(LOG_LEVEL)
 
 
 def check_tokens():
@@ -46,17 +71,110 @@ def check_tokens():
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+def get_message_digest(message):
+    """Возвращает короткий хэш текста сообщения."""
+    return hashlib.blake2b(message.encode(), digest_size=16).hexdigest()
+
+
+def open_state():
+    """
+    Открывает файл состояния BOT_STATE_FILE.
+    Возвращает None, если файл не задан или не открывается.
+    Индекс dumb-dbm разбирается через ast.literal_eval,
+    поэтому повреждённый файл даёт ValueError или SyntaxError.
+    """
+    if not BOT_STATE_FILE:
+        return None
+    try:
+        return dbm.open(BOT_STATE_FILE, 'c')
+    except (OSError, ValueError, SyntaxError, *dbm.error) as error:
+        logger.error('Не удалось открыть файл состояния: %s', error)
+        return None
+
+
+def is_new_message(message):
+    """
+    Проверяет, не отправлялось ли сообщение до перезапуска бота.
+    Хэш последнего отправленного сообщения хранится в файле
+    BOT_STATE_FILE не дольше SENT_MESSAGE_TTL секунд.
+    Если файл не задан, недоступен или повреждён,
+    любое сообщение считается новым.
+    """
+    state = open_state()
+    if state is None:
+        return True
+    try:
+        with state:
+            record = state.get(STATE_KEY, b'')
+    except (OSError, *dbm.error) as error:
+        logger.error('Не удалось прочитать файл состояния: %s', error)
+        return True
+    last_digest, _, expires_at = record.partition(b':')
+    try:
+        expires_at = float(expires_at)
+    except ValueError:
+        return True
+    return (
+        last_digest != get_message_digest(message).encode()
+        or expires_at <= time.time()
+    )
+
+
+def remember_message(message):
+    """
+    Сохраняет хэш отправленного сообщения в файле BOT_STATE_FILE.
+    Ошибки записи только логируются: отправка сообщений
+    не должна зависеть от файла состояния.
+    """
+    state = open_state()
+    if state is None:
+        return
+    try:
+        with state:
+            expires_at = time.time() + SENT_MESSAGE_TTL
+            state[STATE_KEY] = f'{get_message_digest(message)}:{expires_at}'
+    except (OSError, *dbm.error) as error:
+        logger.error('Не удалось сохранить файл состояния: %s', error)
+
+
 def send_message(bot, message):
     """
     Отправляет сообщение в Telegram чат.
     Принимает на вход два параметра:
     экземпляр класса Bot и строку с текстом сообщения.
+    При превышении лимита запросов Telegram ждёт указанное
+    время и повторяет отправку; если ждать нужно дольше
+    TELEGRAM_RETRY_MAX секунд, сообщение не отправляется.
     """
-    try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug('Сообщение в телеграм успешно отправлено.')
-    except TelegramError:
-        logger.error('Не получилось отправить сообщение.')
+    if not is_new_message(message):
+        logger.debug('Сообщение уже было отправлено ранее.')
+        return
+    for attempt in range(1, TELEGRAM_SEND_ATTEMPTS + 1):
+        try:
+            bot.send_message(
+                TELEGRAM_CHAT_ID, message, timeout=TELEGRAM_TIMEOUT
+            )
+        except RetryAfter as error:
+            if attempt == TELEGRAM_SEND_ATTEMPTS:
+                break
+            if error.retry_after > TELEGRAM_RETRY_MAX:
+                logger.error(
+                    'Превышен лимит Telegram, ожидание %s с слишком долгое.',
+                    error.retry_after
+                )
+                return
+            logger.warning(
+                'Превышен лимит Telegram, повтор через %s с.',
+                error.retry_after
+            )
+            time.sleep(error.retry_after)
+        except TelegramError:
+            break
+        else:
+            logger.debug('Сообщение в телеграм успешно отправлено.')
+            remember_message(message)
+            return
+    logger.error('Не получилось отправить сообщение.')
 
 
 def get_api_answer(timestamp):
@@ -69,7 +187,8 @@ def get_api_answer(timestamp):
     payload = {'from_date': timestamp}
     try:
         homework_statuses = requests.get(
-            ENDPOINT, headers=HEADERS, params=payload
+            ENDPOINT, headers=HEADERS, params=payload,
+            timeout=REQUEST_TIMEOUT
         )
     except requests.RequestException as e:
         raise ApiRequestError(f'Ошибка при отправке запроса к api: {e}')
@@ -79,7 +198,7 @@ def get_api_answer(timestamp):
             f'Текст ответа: {homework_statuses.text}, '
             f'Заголовок ответа: {homework_statuses.headers}, '
         )
-    return homework_statuses.json()
+    return orjson.loads(homework_statuses.content)
 
 
 def check_response(response):
@@ -93,7 +212,7 @@ def check_response(response):
     homeworks = response.get('homeworks')
     if not isinstance(homeworks, list):
         raise TypeError('Данные пришли не в виду списка.')
-    return response.get('homeworks')
+    return homeworks
 
 
 def parse_status(homeworks):
@@ -105,15 +224,15 @@ def parse_status(homeworks):
     подготовленную для отправки в Telegram строку,
     содержащую один из вердиктов словаря HOMEWORK_VERDICTS.
     """
-    homework_name = homeworks.get('homework_name')
+    try:
+        homework_name, homework_status = HOMEWORK_FIELDS(homeworks)
+    except KeyError as error:
+        raise KeyError(f'В информации о домашней работе нет ключа {error}!')
     if not homework_name:
-        raise KeyError('Отсутствует ключ названия домашней работы!')
-    homework_status = homeworks.get('status')
-    if not homework_status:
-        raise KeyError('Не найден ключ статуса домашней работы!')
-    if homework_status not in HOMEWORK_VERDICTS.keys():
+        raise KeyError('Отсутствует название домашней работы!')
+    verdict = HOMEWORK_VERDICTS.get(homework_status)
+    if verdict is None:
         raise KeyError('Получен неожиданный статус домашней работы!')
-    verdict = HOMEWORK_VERDICTS[homework_status]
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
@@ -132,6 +251,8 @@ def main():
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
     timestamp = int(time.time())
     messages = ''
+    fail_count = 0
+    next_tick = time.monotonic()
     while True:
         try:
             response = get_api_answer(timestamp)
@@ -155,8 +276,16 @@ def main():
                 messages = message
                 send_message(bot, messages)
                 messages = ''
-        finally:
-            time.sleep(RETRY_PERIOD)
+            delay = min(RETRY_PERIOD_MAX, RETRY_PERIOD * 2 ** fail_count)
+            if delay < RETRY_PERIOD_MAX:
+                fail_count += 1
+            time.sleep(delay + random.uniform(0, RETRY_JITTER))
+            next_tick = time.monotonic()
+        else:
+            fail_count = 0
+            next_tick = max(next_tick + RETRY_PERIOD, time.monotonic())
+            delay = max(0, next_tick - time.monotonic())
+            time.sleep(delay)
 
 
 if __name__ == '__main__':
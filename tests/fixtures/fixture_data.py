@@ -23,6 +23,18 @@ def homework_module():
     return homework
 
 
+@pytest.fixture
+def state_file(monkeypatch, tmp_path, homework_module):
+    path = str(tmp_path / 'state')
+    monkeypatch.setattr(homework_module, 'BOT_STATE_FILE', path)
+    return path
+
+
+@pytest.fixture
+def no_state_file(monkeypatch, homework_module):
+    monkeypatch.setattr(homework_module, 'BOT_STATE_FILE', None)
+
+
 @pytest.fixture
 def random_message():
     def random_string(string_length=15):
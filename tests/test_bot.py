@@ -1,6 +1,11 @@
+import dbm
 import inspect
 import logging
+import os
+import random
 import re
+import subprocess
+import sys
 import time
 from http import HTTPStatus
 
@@ -147,6 +152,36 @@ class TestHomework:
             '(`logging.getLogger()`).'
         )
 
+    def run_with_log_level(self, homework_module, name):
+        """Import the bot in a fresh interpreter with LOG_LEVEL set."""
+        return subprocess.run(
+            [
+                sys.executable, '-c',
+                'import homework; print(homework.LOG_LEVEL)'
+            ],
+            cwd=os.path.dirname(homework_module.__file__),
+            env={**os.environ, 'LOG_LEVEL': name},
+            capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+
+    @pytest.mark.parametrize('name, level', [
+        ('debug', logging.DEBUG),
+        ('Warning', logging.WARNING),
+        ('ERROR', logging.ERROR),
+    ])
+    def test_log_level_from_env(self, name, level, homework_module):
+        output = self.run_with_log_level(homework_module, name)
+        assert output == [str(level)]
+
+    @pytest.mark.parametrize('name', ['verbose', 'basic_format', ''])
+    def test_log_level_from_env_invalid(self, name, homework_module):
+        *log, level = self.run_with_log_level(homework_module, name)
+        assert level == str(logging.INFO)
+        assert any(' - WARNING - ' in line for line in log), (
+            'Убедитесь, что неизвестный уровень логирования '
+            'логируется с уровнем `WARNING`.'
+        )
+
     def test_request_get_call(self, monkeypatch, current_timestamp,
                               homework_module):
         func_name = 'get_api_answer'
@@ -374,6 +409,14 @@ class TestHomework:
                 '`homework_name`.'
             )
 
+    @pytest.mark.parametrize('homework_name', [None, ''])
+    def test_parse_status_empty_homework_name(self, homework_name,
+                                              homework_module):
+        with pytest.raises(KeyError):
+            homework_module.parse_status(
+                {'homework_name': homework_name, 'status': 'approved'}
+            )
+
     def test_check_response(self, random_timestamp, homework_module):
         func_name = 'check_response'
         utils.check_function(
@@ -509,6 +552,124 @@ class TestHomework:
             except Exception:
                 pass
 
+    def test_send_message_without_state_file(self, no_state_file,
+                                             homework_module):
+        bot = utils.MockTelegramBotWithErrors()
+        homework_module.send_message(bot, 'Test_message_check')
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 2
+
+    def test_send_message_skips_duplicate_within_ttl(self, state_file,
+                                                     homework_module):
+        bot = utils.MockTelegramBotWithErrors()
+        homework_module.send_message(bot, 'Test_message_check')
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 1
+        homework_module.send_message(bot, 'Other_message')
+        assert bot.calls == 2
+
+    def test_send_message_resends_after_ttl(self, monkeypatch, state_file,
+                                            homework_module):
+        monkeypatch.setattr(homework_module, 'SENT_MESSAGE_TTL', -1)
+        bot = utils.MockTelegramBotWithErrors()
+        homework_module.send_message(bot, 'Test_message_check')
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 2
+
+    def test_send_message_failed_send_is_not_remembered(self, state_file,
+                                                        homework_module):
+        bot = utils.MockTelegramBotWithErrors(
+            [telegram.error.TelegramError('Something wrong')]
+        )
+        homework_module.send_message(bot, 'Test_message_check')
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 2
+
+    def test_send_message_with_unavailable_state_file(self, monkeypatch,
+                                                      tmp_path, caplog,
+                                                      homework_module):
+        monkeypatch.setattr(
+            homework_module, 'BOT_STATE_FILE',
+            str(tmp_path / 'missing' / 'state')
+        )
+        bot = utils.MockTelegramBotWithErrors()
+        with utils.check_logging(caplog, level=logging.ERROR, message=(
+            'Убедитесь, что ошибка файла состояния логируется '
+            'с уровнем `ERROR`.'
+        )):
+            homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 1
+
+    @pytest.mark.parametrize('record', [b'garbage', b'digest:never', b''])
+    def test_send_message_with_malformed_state_record(self, state_file,
+                                                      record,
+                                                      homework_module):
+        with dbm.open(state_file, 'c') as state:
+            state[homework_module.STATE_KEY] = record
+        bot = utils.MockTelegramBotWithErrors()
+        homework_module.send_message(bot, 'Test_message_check')
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 1
+
+    def test_send_message_with_corrupted_state_file(self, state_file,
+                                                    tmp_path, caplog,
+                                                    homework_module):
+        bot = utils.MockTelegramBotWithErrors()
+        homework_module.send_message(bot, 'Test_message_check')
+        for path in tmp_path.iterdir():
+            path.write_bytes(b'\x80\x04\x95corrupted')
+        with utils.check_logging(caplog, level=logging.ERROR, message=(
+            'Убедитесь, что ошибка файла состояния логируется '
+            'с уровнем `ERROR`.'
+        )):
+            homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 2
+
+    def test_send_message_retries_after_flood_control(self, monkeypatch,
+                                                      no_state_file,
+                                                      homework_module):
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        bot = utils.MockTelegramBotWithErrors(
+            [telegram.error.RetryAfter(5)]
+        )
+        homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 2
+        assert sleeps == [5]
+
+    def test_send_message_skips_long_flood_control(self, monkeypatch,
+                                                   caplog, no_state_file,
+                                                   homework_module):
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        bot = utils.MockTelegramBotWithErrors(
+            [telegram.error.RetryAfter(3600)]
+        )
+        with utils.check_logging(caplog, level=logging.ERROR, message=(
+            'Убедитесь, что слишком долгое ожидание лимита Telegram '
+            'логируется с уровнем `ERROR`.'
+        )):
+            homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == 1
+        assert sleeps == []
+
+    def test_send_message_gives_up_after_flood_control(self, monkeypatch,
+                                                       caplog, no_state_file,
+                                                       homework_module):
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        attempts = homework_module.TELEGRAM_SEND_ATTEMPTS
+        bot = utils.MockTelegramBotWithErrors(
+            [telegram.error.RetryAfter(5) for _ in range(attempts)]
+        )
+        with utils.check_logging(caplog, level=logging.ERROR, message=(
+            'Убедитесь, что неудачная отправка после всех попыток '
+            'логируется с уровнем `ERROR`.'
+        )):
+            homework_module.send_message(bot, 'Test_message_check')
+        assert bot.calls == attempts
+        assert sleeps == [5] * (attempts - 1)
+
     def test_bot_initialized_in_main(self, homework_module):
         func_name = 'main'
         utils.check_function(
@@ -566,6 +727,7 @@ class TestHomework:
             raise utils.BreakInfiniteLoop('break')
 
         monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        monkeypatch.setattr(time, 'monotonic', lambda: 0.0)
 
         def mock_telegram_bot(random_message=random_message, *args, **kwargs):
             return utils.MockTelegramBot(*args,
@@ -753,6 +915,100 @@ class TestHomework:
                     'из переменной `HOMEWORK_VERDICTS`.'
                 )
 
+    def test_main_subtracts_poll_time_from_sleep(self, monkeypatch,
+                                                 random_timestamp,
+                                                 homework_module):
+        homework_module.PRACTICUM_TOKEN = 'sometoken'
+        homework_module.TELEGRAM_TOKEN = '1234:abcdefg'
+        homework_module.TELEGRAM_CHAT_ID = '12345'
+        monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: None
+        )
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp, **kwargs
+            )
+
+        clock = iter([0.0, 0.25, 0.25])
+        sleeps = []
+
+        def mock_sleep(secs):
+            sleeps.append(secs)
+            raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(time, 'monotonic', lambda: next(clock))
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert sleeps == [self.RETRY_PERIOD - 0.25]
+
+    def test_main_backs_off_after_errors(self, monkeypatch, random_timestamp,
+                                         homework_module):
+        homework_module.PRACTICUM_TOKEN = 'sometoken'
+        homework_module.TELEGRAM_TOKEN = '1234:abcdefg'
+        homework_module.TELEGRAM_CHAT_ID = '12345'
+        monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: None
+        )
+        monkeypatch.setattr(random, 'uniform', lambda a, b: 0)
+        outcomes = [False, False, True, False]
+
+        def mock_response_get(*args, **kwargs):
+            if not outcomes.pop(0):
+                raise requests.ConnectionError('Something wrong')
+            return utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp, **kwargs
+            )
+
+        sleeps = []
+
+        def mock_sleep(secs):
+            sleeps.append(secs)
+            if not outcomes:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        monkeypatch.setattr(time, 'monotonic', lambda: 0.0)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert sleeps == [
+            self.RETRY_PERIOD, 2 * self.RETRY_PERIOD,
+            self.RETRY_PERIOD, self.RETRY_PERIOD
+        ]
+
+    def test_main_backoff_is_capped(self, monkeypatch, homework_module):
+        homework_module.PRACTICUM_TOKEN = 'sometoken'
+        homework_module.TELEGRAM_TOKEN = '1234:abcdefg'
+        homework_module.TELEGRAM_CHAT_ID = '12345'
+        monkeypatch.setattr(telegram, 'Bot', utils.MockTelegramBot)
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: None
+        )
+        monkeypatch.setattr(random, 'uniform', lambda a, b: 0)
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.ConnectionError('Something wrong')
+
+        sleeps = []
+
+        def mock_sleep(secs):
+            sleeps.append(secs)
+            if len(sleeps) == 8:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert sleeps == [600, 1200, 2400] + [
+            homework_module.RETRY_PERIOD_MAX
+        ] * 5
+
     def test_docstrings(self, homework_module):
         for func in self.HOMEWORK_FUNC_WITH_PARAMS_QTY:
             utils.check_docstring(homework_module, func)
@@ -1,3 +1,4 @@
+import json
 import logging
 from collections import namedtuple
 from contextlib import contextmanager
@@ -90,6 +91,10 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
 
 class MockTelegramBot:
     def __init__(self, **kwargs):
@@ -101,5 +106,18 @@ class MockTelegramBot:
         self.text = text
 
 
+class MockTelegramBotWithErrors:
+    """Raise the given errors one per call, then send successfully."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
 class BreakInfiniteLoop(Exception):
     pass